@@ -33,20 +33,31 @@ INV_ROTATION = {'': '', 'y': "y'", "y'": 'y', 'y2': 'y2'}
 ALL_SLOTS = ['FR', 'FL', 'BR']  # BL excluded: not visible from camera angle
 
 
+def _invert_move(m):
+    """Inverse of a single move token."""
+    if m.endswith("'"):
+        return m[:-1]
+    elif m.endswith('2'):
+        return m
+    return m + "'"
+
+
+# Inverse of every face, slice, wide and rotation token, built once so
+# invert_alg is a dict lookup per move. Unlisted tokens fall back to
+# _invert_move.
+_INV_MOVE = {m: _invert_move(m)
+             for base in 'RLUDFBMSErludfbxyz'
+             for m in (base, base + "'", base + '2')}
+
+
 def invert_alg(alg_str):
     """Compute the inverse of an algorithm string."""
     moves = parse_algorithm(alg_str)
     if not moves:
         return ''
-    inv = []
-    for m in reversed(moves):
-        if m.endswith("'"):
-            inv.append(m[:-1])
-        elif m.endswith('2'):
-            inv.append(m)
-        else:
-            inv.append(m + "'")
-    return ' '.join(inv)
+    # No table entry is empty, so `or` only falls back for unlisted tokens
+    inv = _INV_MOVE.get
+    return ' '.join([inv(m) or _invert_move(m) for m in reversed(moves)])
 
 
 def _get_f2l_list():
@@ -4,6 +4,9 @@ StickerDataset: loads PNG + JSON pairs from training_renders/ directory.
 Each sample returns:
   - image: (3, 224, 224) tensor, normalized with ImageNet stats
   - label: (27,) tensor of class indices (W=0, Y=1, R=2, O=3, G=4, B=5)
+
+Labels for every sample are read once at construction into a single (N, 27)
+tensor, so fetching a sample only opens its image.
 """
 
 import json
@@ -80,6 +83,19 @@ class StickerDataset(Dataset):
 
         self.samples = [all_samples[i] for i in selected]
 
+        # Read every label file once: image paths + one (N, 27) label tensor
+        self.image_paths = []
+        labels = []
+        for d, j in self.samples:
+            with open(os.path.join(d, j)) as f:
+                label_data = json.load(f)
+            self.image_paths.append(os.path.join(d, label_data['image']))
+            # Extract 27 sticker labels: U[0-8] + F[0-8] + R[0-8]
+            full_state = label_data['full_state']
+            stickers = full_state['U'] + full_state['F'] + full_state['R']
+            labels.append([COLOR_TO_IDX[c] for c in stickers])
+        self.labels = torch.tensor(labels, dtype=torch.long).reshape(-1, 27)
+
         # Transforms
         base_transforms = [
             transforms.Resize((224, 224)),
@@ -106,24 +122,8 @@ class StickerDataset(Dataset):
         return len(self.samples)
 
     def __getitem__(self, idx):
-        data_dir, json_file = self.samples[idx]
-        json_path = os.path.join(data_dir, json_file)
-
-        with open(json_path) as f:
-            label_data = json.load(f)
-
-        # Load image
-        img_file = label_data['image']
-        img_path = os.path.join(data_dir, img_file)
-        image = Image.open(img_path).convert('RGB')
-        image = self.transform(image)
-
-        # Extract 27 sticker labels: U[0-8] + F[0-8] + R[0-8]
-        full_state = label_data['full_state']
-        stickers = full_state['U'] + full_state['F'] + full_state['R']
-        label = torch.tensor([COLOR_TO_IDX[c] for c in stickers], dtype=torch.long)
-
-        return image, label
+        image = Image.open(self.image_paths[idx]).convert('RGB')
+        return self.transform(image), self.labels[idx]
 
 
 if __name__ == "__main__":
@@ -5,6 +5,8 @@ Input:  (B, 3, 224, 224) RGB image
 Output: (B, 27, 6) logits — 27 sticker positions, 6 color classes each
 """
 
+import itertools
+
 import torch
 import torch.nn as nn
 from torchvision.models import resnet18, ResNet18_Weights
@@ -13,6 +15,7 @@ from torchvision.models import resnet18, ResNet18_Weights
 COLOR_CLASSES = ['W', 'Y', 'R', 'O', 'G', 'B']
 NUM_COLORS = len(COLOR_CLASSES)
 NUM_STICKERS = 27  # U[0-8] + F[0-8] + R[0-8]
+NUM_FROZEN_CHILDREN = 6  # conv1, bn1, relu, maxpool, layer1, layer2
 
 
 class StickerClassifier(nn.Module):
@@ -33,6 +36,7 @@ class StickerClassifier(nn.Module):
             backbone.layer4,
         )
         self.pool = nn.AdaptiveAvgPool2d(1)
+        self._early_frozen = False
 
         # Classification head: 512 -> 256 -> 27*6
         self.head = nn.Sequential(
@@ -55,20 +59,41 @@ class StickerClassifier(nn.Module):
         logits = self.head(feat)          # (B, 162)
         return logits.view(-1, NUM_STICKERS, NUM_COLORS)  # (B, 27, 6)
 
+    def _frozen_children(self):
+        return list(self.features.children())[:NUM_FROZEN_CHILDREN]
+
+    def early_layer_parameters(self):
+        """Parameters of ResNet layers 1-2 (conv1, bn1, layer1, layer2)."""
+        frozen = self._frozen_children()
+        return list(itertools.chain.from_iterable(c.parameters() for c in frozen))
+
     def freeze_early_layers(self):
-        """Freeze ResNet layers 1-2 (conv1, bn1, layer1, layer2)."""
-        for i, child in enumerate(self.features.children()):
-            if i < 5:  # conv1, bn1, relu, maxpool, layer1 — plus layer2 at index 5
-                for p in child.parameters():
-                    p.requires_grad = False
-        # Also freeze layer2 (index 5)
-        for p in list(self.features.children())[5].parameters():
-            p.requires_grad = False
+        """Freeze ResNet layers 1-2 (conv1, bn1, layer1, layer2).
+
+        BatchNorm layers in the frozen prefix are kept in eval mode so their
+        running statistics stop updating while frozen.
+        """
+        for p in self.early_layer_parameters():
+            p.requires_grad_(False)
+        self._early_frozen = True
+        self.train(self.training)
 
     def unfreeze_all(self):
         """Unfreeze all parameters."""
         for p in self.parameters():
             p.requires_grad = True
+        self._early_frozen = False
+        self.train(self.training)
+
+    def train(self, mode=True):
+        """Set train/eval mode, keeping frozen BatchNorm layers in eval."""
+        super().train(mode)
+        if mode and self._early_frozen:
+            for child in self._frozen_children():
+                for m in child.modules():
+                    if isinstance(m, nn.BatchNorm2d):
+                        m.eval()
+        return self
 
 
 if __name__ == "__main__":
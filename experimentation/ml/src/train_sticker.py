@@ -41,12 +41,15 @@ def train_epoch(model, loader, optimizer, criterion, device):
         images = images.to(device)
         labels = labels.to(device)  # (B, 27)
 
+        # Drop last step's grads before the forward pass so their memory is
+        # free while activations for this batch are allocated.
+        optimizer.zero_grad(set_to_none=True)
+
         logits = model(images)  # (B, 27, 6)
 
         # Reshape for cross-entropy: (B*27, 6) vs (B*27,)
         loss = criterion(logits.reshape(-1, 6), labels.reshape(-1))
 
-        optimizer.zero_grad(set_to_none=True)
         loss.backward()
         optimizer.step()
 
@@ -129,17 +132,22 @@ def main():
     num_params = sum(p.numel() for p in model.parameters())
     print(f"Model parameters: {num_params:,}")
 
-    # Freeze early layers initially
+    # Early layers start frozen and sit in their own lr=0 param group, so the
+    # optimizer and its moment buffers never need rebuilding when they thaw.
+    # AdamW skips them while frozen, since their grads stay None.
     model.freeze_early_layers()
-    frozen_params = sum(1 for p in model.parameters() if not p.requires_grad)
+    early_params = model.early_layer_parameters()
+    early_ids = {id(p) for p in early_params}
+    rest_params = [p for p in model.parameters() if id(p) not in early_ids]
     trainable_params = sum(p.numel() for p in model.parameters() if p.requires_grad)
     print(f"Trainable parameters (frozen mode): {trainable_params:,}")
 
     criterion = nn.CrossEntropyLoss(label_smoothing=0.1)
-    optimizer = torch.optim.AdamW(
-        filter(lambda p: p.requires_grad, model.parameters()),
-        lr=args.lr, weight_decay=1e-4
-    )
+    optimizer = torch.optim.AdamW([
+        {'params': rest_params, 'lr': args.lr},
+        {'params': early_params, 'lr': 0.0},
+    ], weight_decay=1e-4)
+    early_group = optimizer.param_groups[1]
     scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(optimizer, T_max=args.epochs)
 
     # Checkpoint dir
@@ -149,17 +157,11 @@ def main():
     start = time.time()
 
     for epoch in range(1, args.epochs + 1):
-        # Unfreeze all layers after epoch 5
+        # Unfreeze early layers after epoch 5 at a reduced LR
         if epoch == 6:
             print("\n--- Unfreezing all layers ---")
             model.unfreeze_all()
-            # Rebuild optimizer with all params at reduced LR
-            optimizer = torch.optim.AdamW(
-                model.parameters(), lr=args.lr * 0.3, weight_decay=1e-4
-            )
-            scheduler = torch.optim.lr_scheduler.CosineAnnealingLR(
-                optimizer, T_max=args.epochs - 5
-            )
+            early_group['lr'] = args.lr * 0.3
 
         train_loss, train_acc = train_epoch(model, train_loader, optimizer, criterion, device)
         val_loss, val_sticker_acc, val_image_acc = validate(model, val_loader, criterion, device)
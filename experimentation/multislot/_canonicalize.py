@@ -2,8 +2,10 @@
 State canonicalization for multi-slot F2L finder.
 
 Provides functions to identify F2L piece positions and encode cube state
-into canonical string keys, with AUF (Adjust U Face) normalization so that
+into canonical integer keys, with AUF (Adjust U Face) normalization so that
 states differing only by a U-layer rotation map to the same canonical key.
+Keys pack 3-bit position/color codes into a single int; key_to_str() and
+key_from_str() convert to and from the human-readable form.
 
 Face indexing:
     0 1 2
@@ -13,6 +15,7 @@ Face indexing:
 Colors: U=W, D=Y, F=R, B=O, L=G, R=B
 """
 
+import functools
 import os
 import sys
 
@@ -77,6 +80,79 @@ SLOT_EDGE_COLORS = {
 # AUF moves to try for canonical_key normalization
 _AUF_MOVES = ['', 'U', 'U2', "U'"]
 
+# ---------------------------------------------------------------------------
+# Packed key encoding
+# ---------------------------------------------------------------------------
+
+# Every field is a 3-bit code. Codes are assigned in alphabetical order so
+# that comparing packed ints gives the same ordering as comparing the
+# readable key strings (the canonical AUF choice is unchanged).
+_COLOR_NAMES = ('B', 'G', 'O', 'R', 'W', 'Y')
+_CORNER_NAMES = tuple(sorted(CORNER_POSITIONS))
+_EDGE_NAMES = tuple(sorted(EDGE_POSITIONS))
+
+_COLOR_CODES = {c: i for i, c in enumerate(_COLOR_NAMES)}
+_CORNER_CODES = {name: i for i, name in enumerate(_CORNER_NAMES)}
+_EDGE_CODES = {name: i for i, name in enumerate(_EDGE_NAMES)}
+
+_FIELD_BITS = 3
+_FIELD_MASK = (1 << _FIELD_BITS) - 1
+
+
+# ---------------------------------------------------------------------------
+# AUF facet tables
+# ---------------------------------------------------------------------------
+
+def _facet_sources(alg):
+    """Map each facet (face, idx) to the facet whose sticker lands there
+    after applying alg to the cube."""
+    probe = Cube()
+    for face in probe.faces:
+        probe.faces[face] = [(face, i) for i in range(9)]
+    probe.apply_algorithm(alg)
+    return {(face, i): probe.faces[face][i]
+            for face in probe.faces for i in range(9)}
+
+
+def _remap_positions(positions_dict, sources):
+    """Rewrite a positions table so reading it on the original cube yields
+    the stickers the moved cube shows at each position."""
+    return {name: [sources[facet] for facet in facets]
+            for name, facets in positions_dict.items()}
+
+
+# auf -> (corner_positions, edge_positions) read directly from the un-moved
+# cube, so canonical_key never has to copy the cube and apply U turns.
+_AUF_POSITIONS = {}
+for _auf in _AUF_MOVES:
+    _sources = _facet_sources(_auf)
+    _AUF_POSITIONS[_auf] = (_remap_positions(CORNER_POSITIONS, _sources),
+                            _remap_positions(EDGE_POSITIONS, _sources))
+del _auf, _sources
+
+# Fingerprint: the stickers at every facet any position table reads, in a
+# fixed order. AUF turns only permute these facets among themselves, so the
+# fingerprint fully determines canonical_key for any set of target slots.
+_FINGERPRINT_FACETS = tuple(dict.fromkeys(
+    facet
+    for table in (CORNER_POSITIONS, EDGE_POSITIONS)
+    for facets in table.values()
+    for facet in facets
+))
+_FINGERPRINT_INDEX = {facet: i for i, facet in enumerate(_FINGERPRINT_FACETS)}
+
+# auf -> (corner_table, edge_table) with facets replaced by fingerprint indices
+_AUF_FINGERPRINT_TABLES = {
+    auf: tuple(
+        {name: tuple(_FINGERPRINT_INDEX[facet] for facet in facets)
+         for name, facets in table.items()}
+        for table in tables
+    )
+    for auf, tables in _AUF_POSITIONS.items()
+}
+
+_CANONICAL_CACHE_SIZE = 1 << 18
+
 
 # ---------------------------------------------------------------------------
 # Core functions
@@ -107,59 +183,161 @@ def find_piece(cube, piece_colors, positions_dict):
     raise ValueError(f"Piece {piece_colors} not found in {list(positions_dict.keys())}")
 
 
-def make_state_key(cube, target_slots):
-    """Build a deterministic string key encoding the positions and orientations
-    of the corner and edge pieces for the given F2L slots.
+def build_piece_index(cube, positions_dict):
+    """Index every position in positions_dict by the colors currently there.
 
-    The key uniquely represents where each target piece currently sits and how
-    its stickers are oriented, so two cubes with the same key have the same
-    F2L state for those slots.
+    One pass over the positions replaces repeated find_piece scans: each
+    piece's color set is unique, so a single dict lookup locates it.
 
     Args:
         cube: Cube instance.
-        target_slots: tuple/list of slot names, e.g. ('FR', 'FL').
+        positions_dict: CORNER_POSITIONS or EDGE_POSITIONS.
 
     Returns:
-        Key string, e.g. "FL:c=UBL:R.G.Y,e=UF:R.G|FR:c=DFR:Y.R.B,e=FR:B.R"
+        dict mapping frozenset(colors) -> (position_name, sticker_tuple).
     """
-    parts = []
+    index = {}
+    for pos_name, facets in positions_dict.items():
+        stickers = tuple(cube.faces[face][idx] for face, idx in facets)
+        index[frozenset(stickers)] = (pos_name, stickers)
+    return index
+
+
+def _lookup_piece(index, piece_colors, positions_dict):
+    """Look up a piece in a build_piece_index() result, raising like find_piece."""
+    try:
+        return index[piece_colors]
+    except KeyError:
+        raise ValueError(
+            f"Piece {piece_colors} not found in {list(positions_dict.keys())}"
+        ) from None
+
+
+def _pack_pieces(corner_index, edge_index, target_slots):
+    """Pack the target slots' piece positions and stickers into an int key."""
+    key = 0
     for slot in sorted(target_slots):
         c_colors = SLOT_CORNER_COLORS[slot]
         e_colors = SLOT_EDGE_COLORS[slot]
 
-        c_pos, c_stickers = find_piece(cube, c_colors, CORNER_POSITIONS)
-        e_pos, e_stickers = find_piece(cube, e_colors, EDGE_POSITIONS)
+        c_pos, c_stickers = _lookup_piece(corner_index, c_colors, CORNER_POSITIONS)
+        e_pos, e_stickers = _lookup_piece(edge_index, e_colors, EDGE_POSITIONS)
 
-        c_str = f"c={c_pos}:{'.'.join(c_stickers)}"
-        e_str = f"e={e_pos}:{'.'.join(e_stickers)}"
-        parts.append(f"{slot}:{c_str},{e_str}")
+        key = (key << _FIELD_BITS) | _CORNER_CODES[c_pos]
+        for c in c_stickers:
+            key = (key << _FIELD_BITS) | _COLOR_CODES[c]
+        key = (key << _FIELD_BITS) | _EDGE_CODES[e_pos]
+        for c in e_stickers:
+            key = (key << _FIELD_BITS) | _COLOR_CODES[c]
 
-    return '|'.join(parts)
+    return key
 
 
-def canonical_key(cube, target_slots):
-    """Compute a canonical state key that is invariant under AUF (U moves).
+def make_state_key(cube, target_slots, corner_positions=CORNER_POSITIONS,
+                   edge_positions=EDGE_POSITIONS):
+    """Build a deterministic integer key encoding the positions and
+    orientations of the corner and edge pieces for the given F2L slots.
 
-    Tries all four U-layer adjustments ('', U, U2, U'), computes make_state_key
-    for each, and returns the lexicographically smallest key along with the AUF
-    move that produced it.
+    The key uniquely represents where each target piece currently sits and how
+    its stickers are oriented, so two cubes with the same key have the same
+    F2L state for those slots. For each slot (in sorted order) the corner
+    position, corner stickers, edge position and edge stickers are packed as
+    3-bit codes, 21 bits per slot.
 
     Args:
         cube: Cube instance.
-        target_slots: tuple/list of slot names.
+        target_slots: tuple/list of slot names, e.g. ('FR', 'FL').
+        corner_positions: Corner facet table to read (default: CORNER_POSITIONS).
+        edge_positions: Edge facet table to read (default: EDGE_POSITIONS).
 
     Returns:
-        (key_str, auf_str) — the canonical key and the AUF move that maps the
-        cube to its canonical orientation.
+        Packed int key. Use key_to_str() for the readable form, e.g.
+        "FL:c=UBL:R.G.Y,e=UF:R.G|FR:c=DFR:Y.R.B,e=FR:B.R"
     """
+    corner_index = build_piece_index(cube, corner_positions)
+    edge_index = build_piece_index(cube, edge_positions)
+    return _pack_pieces(corner_index, edge_index, target_slots)
+
+
+def key_to_str(key, target_slots):
+    """Decode a make_state_key() int into its human-readable string form.
+
+    Args:
+        key: Packed int key.
+        target_slots: The slots the key was built for.
+
+    Returns:
+        Key string, e.g. "FL:c=UBL:R.G.Y,e=UF:R.G|FR:c=DFR:Y.R.B,e=FR:B.R"
+    """
+    parts = []
+    for slot in reversed(sorted(target_slots)):
+        fields = []
+        for _ in range(7):
+            fields.append(key & _FIELD_MASK)
+            key >>= _FIELD_BITS
+        fields.reverse()
+        c_pos = _CORNER_NAMES[fields[0]]
+        c_stickers = [_COLOR_NAMES[f] for f in fields[1:4]]
+        e_pos = _EDGE_NAMES[fields[4]]
+        e_stickers = [_COLOR_NAMES[f] for f in fields[5:7]]
+        parts.append(f"{slot}:c={c_pos}:{'.'.join(c_stickers)},"
+                     f"e={e_pos}:{'.'.join(e_stickers)}")
+    parts.reverse()
+    return '|'.join(parts)
+
+
+def key_from_str(key_str):
+    """Parse a key_to_str() string back into its packed int key."""
+    key = 0
+    for part in key_str.split('|'):
+        _slot, rest = part.split(':', 1)
+        c_part, e_part = rest.split(',')
+        c_pos, c_stickers = c_part[2:].split(':')
+        e_pos, e_stickers = e_part[2:].split(':')
+        key = (key << _FIELD_BITS) | _CORNER_CODES[c_pos]
+        for c in c_stickers.split('.'):
+            key = (key << _FIELD_BITS) | _COLOR_CODES[c]
+        key = (key << _FIELD_BITS) | _EDGE_CODES[e_pos]
+        for c in e_stickers.split('.'):
+            key = (key << _FIELD_BITS) | _COLOR_CODES[c]
+    return key
+
+
+def cube_fingerprint(cube):
+    """Return the stickers canonical_key depends on, as a hashable string.
+
+    Covers every facet of CORNER_POSITIONS and EDGE_POSITIONS, which
+    includes the whole U layer, so two cubes with equal fingerprints have
+    equal canonical keys for every slot combination.
+    """
+    faces = cube.faces
+    return ''.join([faces[face][idx] for face, idx in _FINGERPRINT_FACETS])
+
+
+def _index_fingerprint(fingerprint, table):
+    """build_piece_index() equivalent that reads stickers from a fingerprint."""
+    index = {}
+    for pos_name, slots in table.items():
+        stickers = tuple([fingerprint[i] for i in slots])
+        index[frozenset(stickers)] = (pos_name, stickers)
+    return index
+
+
+def _fingerprint_state_key(fingerprint, target_slots, auf):
+    """make_state_key() of the cube after auf, computed from its fingerprint."""
+    corner_table, edge_table = _AUF_FINGERPRINT_TABLES[auf]
+    return _pack_pieces(_index_fingerprint(fingerprint, corner_table),
+                        _index_fingerprint(fingerprint, edge_table),
+                        target_slots)
+
+
+@functools.lru_cache(maxsize=_CANONICAL_CACHE_SIZE)
+def _canonical_key_cached(fingerprint, target_slots):
     best_key = None
     best_auf = ''
 
     for auf in _AUF_MOVES:
-        test = cube.copy()
-        if auf:
-            test.apply_algorithm(auf)
-        key = make_state_key(test, target_slots)
+        key = _fingerprint_state_key(fingerprint, target_slots, auf)
         if best_key is None or key < best_key:
             best_key = key
             best_auf = auf
@@ -167,6 +345,27 @@ def canonical_key(cube, target_slots):
     return best_key, best_auf
 
 
+def canonical_key(cube, target_slots):
+    """Compute a canonical state key that is invariant under AUF (U moves).
+
+    Tries all four U-layer adjustments ('', U, U2, U'), computes make_state_key
+    for each, and returns the smallest key along with the AUF move that
+    produced it. The adjustments are read through precomputed facet tables
+    rather than by turning a copy of the cube, and results are memoized on
+    cube_fingerprint() since search revisits the same F2L states often.
+
+    Args:
+        cube: Cube instance.
+        target_slots: tuple/list of slot names.
+
+    Returns:
+        (key, auf_str) — the canonical packed int key and the AUF move that
+        maps the cube to its canonical orientation.
+    """
+    return _canonical_key_cached(cube_fingerprint(cube),
+                                 tuple(sorted(target_slots)))
+
+
 # ---------------------------------------------------------------------------
 # Self-tests
 # ---------------------------------------------------------------------------
@@ -193,7 +392,8 @@ if __name__ == '__main__':
     # ------------------------------------------------------------------
     print("Test 1: Solved cube state key")
     cube = Cube()
-    key = make_state_key(cube, ('FR', 'FL', 'BR', 'BL'))
+    key = key_to_str(make_state_key(cube, ('FR', 'FL', 'BR', 'BL')),
+                     ('FR', 'FL', 'BR', 'BL'))
     print(f"  Key: {key}")
 
     # On a solved cube, each slot's pieces should be in their home D-layer
@@ -213,7 +413,7 @@ if __name__ == '__main__':
     print("\nTest 2: After R U R' — FR pieces displaced")
     cube2 = Cube()
     cube2.apply_algorithm("R U R'")
-    key2 = make_state_key(cube2, ('FR',))
+    key2 = key_to_str(make_state_key(cube2, ('FR',)), ('FR',))
     print(f"  Key: {key2}")
     # The FR corner should no longer be at DFR
     check("FR corner NOT at DFR after R U R'", "c=DFR:" not in key2)
@@ -238,13 +438,21 @@ if __name__ == '__main__':
     cube3d.apply_algorithm("U'")
     ckey_d, auf_d = canonical_key(cube3d, ('FR',))
 
-    print(f"  Base key:  {ckey_a} (AUF={auf_a!r})")
-    print(f"  After U:   {ckey_b} (AUF={auf_b!r})")
-    print(f"  After U2:  {ckey_c} (AUF={auf_c!r})")
-    print(f"  After U':  {ckey_d} (AUF={auf_d!r})")
+    print(f"  Base key:  {key_to_str(ckey_a, ('FR',))} (AUF={auf_a!r})")
+    print(f"  After U:   {key_to_str(ckey_b, ('FR',))} (AUF={auf_b!r})")
+    print(f"  After U2:  {key_to_str(ckey_c, ('FR',))} (AUF={auf_c!r})")
+    print(f"  After U':  {key_to_str(ckey_d, ('FR',))} (AUF={auf_d!r})")
     check("canonical_key invariant under U",  ckey_a == ckey_b)
     check("canonical_key invariant under U2", ckey_a == ckey_c)
     check("canonical_key invariant under U'", ckey_a == ckey_d)
+    check("AUF facet table matches turning the cube",
+          make_state_key(cube3a, ('FR',), *_AUF_POSITIONS['U'])
+          == make_state_key(cube3b, ('FR',)))
+    check("Fingerprint read matches turning the cube",
+          _fingerprint_state_key(cube_fingerprint(cube3a), ('FR',), 'U')
+          == make_state_key(cube3b, ('FR',)))
+    check("key_from_str inverts key_to_str",
+          key_from_str(key_to_str(ckey_a, ('FR',))) == ckey_a)
 
     # ------------------------------------------------------------------
     # Test 4: build_f2l_state scrambles specific slots
@@ -254,7 +462,7 @@ if __name__ == '__main__':
     cube4 = Cube()
     details = build_f2l_state(cube4, ['FR', 'FL'], rng)
     key4 = make_state_key(cube4, ('FR', 'FL'))
-    print(f"  Key: {key4}")
+    print(f"  Key: {key_to_str(key4, ('FR', 'FL'))}")
     # Scrambled slots should NOT have pieces in home position
     # (extremely unlikely for a random F2L inverse)
     solved_key = make_state_key(Cube(), ('FR', 'FL'))
@@ -273,8 +481,8 @@ if __name__ == '__main__':
     cube5u = cube5.copy()
     cube5u.apply_algorithm("U")
     ckey5b, auf5b = canonical_key(cube5u, ('FR', 'BR'))
-    print(f"  Key:       {ckey5a} (AUF={auf5a!r})")
-    print(f"  After U:   {ckey5b} (AUF={auf5b!r})")
+    print(f"  Key:       {key_to_str(ckey5a, ('FR', 'BR'))} (AUF={auf5a!r})")
+    print(f"  After U:   {key_to_str(ckey5b, ('FR', 'BR'))} (AUF={auf5b!r})")
     check("Multi-slot canonical_key invariant under U", ckey5a == ckey5b)
 
     # ------------------------------------------------------------------
@@ -287,6 +495,22 @@ if __name__ == '__main__':
     except ValueError:
         check("ValueError raised for bogus colors", True)
 
+    # ------------------------------------------------------------------
+    # Test 7: build_piece_index agrees with find_piece
+    # ------------------------------------------------------------------
+    print("\nTest 7: build_piece_index matches find_piece")
+    cube7 = Cube()
+    build_f2l_state(cube7, ['FR', 'FL'], random.Random(7))
+    c_index = build_piece_index(cube7, CORNER_POSITIONS)
+    e_index = build_piece_index(cube7, EDGE_POSITIONS)
+    for slot in ('FR', 'FL'):
+        check(f"{slot} corner lookup",
+              c_index[SLOT_CORNER_COLORS[slot]]
+              == find_piece(cube7, SLOT_CORNER_COLORS[slot], CORNER_POSITIONS))
+        check(f"{slot} edge lookup",
+              e_index[SLOT_EDGE_COLORS[slot]]
+              == find_piece(cube7, SLOT_EDGE_COLORS[slot], EDGE_POSITIONS))
+
     # ------------------------------------------------------------------
     # Summary
     # ------------------------------------------------------------------
@@ -8,6 +8,10 @@ simplification (cancellation/merging of consecutive same-face moves).
 
 from __future__ import annotations
 
+import functools
+from dataclasses import dataclass
+from typing import Callable
+
 # ---------------------------------------------------------------------------
 # 1. Move costs — base cost for each individual move token
 # ---------------------------------------------------------------------------
@@ -46,21 +50,114 @@ _REDUCED_REGRIP_PAIRS = frozenset([
     ("front", "standard"),
 ])
 
+# ---------------------------------------------------------------------------
+# Move alphabet — moves are interned to small ints so the scoring and
+# simplification loops index flat tuples instead of hashing strings.
+# MOVE_COSTS tokens come first (ids below _NUM_ZONED, all with a grip zone),
+# then every other turn of the faces simplify_moves knows, so the alphabet
+# is closed under merging. Moves outside it all share _UNKNOWN_ID.
+# ---------------------------------------------------------------------------
+
+_ALPHABET_FACES = ("R", "U", "F", "L", "D", "B", "r", "u", "f", "l", "d", "b",
+                   "M", "E", "S", "x", "y", "z")
+
+ID_TO_MOVE: tuple[str, ...] = tuple(dict.fromkeys(
+    [*MOVE_COSTS]
+    + [face + suffix for face in _ALPHABET_FACES for suffix in ("", "2", "'")]
+))
+MOVE_TO_ID: dict[str, int] = {move: i for i, move in enumerate(ID_TO_MOVE)}
+_NUM_ZONED = len(MOVE_COSTS)
+_UNKNOWN_ID = len(ID_TO_MOVE)
+_NUM_TOKENS = _UNKNOWN_ID + 1
+
+_ZONE_ID: dict[str, int] = {
+    zone: i for i, zone in enumerate(dict.fromkeys(MOVE_GRIP_ZONE.values()))
+}
+_NUM_ZONES = len(_ZONE_ID)
+
+
+@dataclass(frozen=True, slots=True)
+class _MoveInfo:
+    """Per-token scoring data: base cost and grip zone id (None = no zone)."""
+    cost: float
+    zone: int | None
+
+
+# One record per token id, built once; moves without a cost entry (the rest
+# of the alphabet and unknown moves) cost 3.0 and have no zone. This is the
+# single source for the per-field tables below.
+_MOVE_INFO: tuple[_MoveInfo, ...] = tuple(
+    _MoveInfo(MOVE_COSTS[tok], _ZONE_ID[MOVE_GRIP_ZONE[tok]])
+    if tok in MOVE_COSTS else _MoveInfo(3.0, None)
+    for tok in ID_TO_MOVE
+) + (_MoveInfo(3.0, None),)
+
+# Per-field views indexed by token id. The scoring loops index these flat
+# tuples, which is cheaper in CPython than attribute access on _MoveInfo.
+_COST_TBL: tuple[float, ...] = tuple(info.cost for info in _MOVE_INFO)
+_ZONE_TBL: tuple[int | None, ...] = tuple(info.zone for info in _MOVE_INFO)
+
+
+def _regrip_penalty(prev_zone: str, zone: str) -> float:
+    if prev_zone == zone:
+        return 0.0
+    if (prev_zone, zone) in _REDUCED_REGRIP_PAIRS:
+        return REDUCED_REGRIP_PENALTY
+    return REGRIP_PENALTY
+
+
+# Flat (prev_zone_id * _NUM_ZONES + zone_id) -> regrip penalty
+_REGRIP_TBL: tuple[float, ...] = tuple(
+    _regrip_penalty(prev_zone, zone)
+    for prev_zone in _ZONE_ID for zone in _ZONE_ID
+)
+
+
+def tokenize_algorithm(alg: str) -> tuple[int, ...]:
+    """Convert an algorithm string into a tuple of move token ids."""
+    token_id = MOVE_TO_ID
+    return tuple([token_id.get(m, _UNKNOWN_ID) for m in alg.split()])
 
-def _count_regrip_cost(moves: list[str]) -> float:
-    """Walk the move list and accumulate regrip penalties."""
+
+def encode_moves(moves: list[str]) -> tuple[int, ...]:
+    """Convert move tokens to alphabet ids; KeyError if one is not in it."""
+    return tuple(map(MOVE_TO_ID.__getitem__, moves))
+
+
+def decode_moves(ids: tuple[int, ...]) -> str:
+    """Convert alphabet ids back into an algorithm string."""
+    id_to_move = ID_TO_MOVE
+    return " ".join([id_to_move[t] for t in ids])
+
+
+# Flat (prev_token_id * _NUM_TOKENS + token_id) -> regrip penalty. Folding
+# the zone lookup into a token-pair table leaves one index per move.
+_PAIR_REGRIP_TBL: tuple[float, ...] = tuple(
+    0.0 if _ZONE_TBL[a] is None or _ZONE_TBL[b] is None
+    else _REGRIP_TBL[_ZONE_TBL[a] * _NUM_ZONES + _ZONE_TBL[b]]
+    for a in range(_NUM_TOKENS) for b in range(_NUM_TOKENS)
+)
+
+
+def _count_regrip_cost(ids: tuple[int, ...]) -> float:
+    """Sum regrip penalties over consecutive grip-zone transitions.
+
+    Moves without a grip zone are dropped up front (only if present); every
+    remaining move is then one token-pair table lookup, 0.0 for same-zone
+    pairs, with no per-move branching.
+    """
+    if not ids:
+        return 0.0
+    if max(ids) >= _NUM_ZONED:
+        ids = [t for t in ids if t < _NUM_ZONED]
+        if not ids:
+            return 0.0
+    pair_tbl = _PAIR_REGRIP_TBL
     cost = 0.0
-    prev_zone: str | None = None
-    for m in moves:
-        zone = MOVE_GRIP_ZONE.get(m)
-        if zone is None:
-            continue  # unknown move — skip
-        if prev_zone is not None and zone != prev_zone:
-            if (prev_zone, zone) in _REDUCED_REGRIP_PAIRS:
-                cost += REDUCED_REGRIP_PENALTY
-            else:
-                cost += REGRIP_PENALTY
-        prev_zone = zone
+    prev = ids[0]
+    for t in ids:
+        cost += pair_tbl[prev * _NUM_TOKENS + t]
+        prev = t
     return cost
 
 
@@ -89,45 +186,74 @@ TRIGGER_BONUSES: list[tuple[list[str], float]] = sorted(
 )
 
 
-def _apply_trigger_bonuses(moves: list[str]) -> float:
+def _build_trigger_trie(triggers):
+    """Build a dense goto trie over move token ids from (pattern, bonus) pairs.
+
+    Returns (goto, output): goto[node][token_id] is the child node (0 = no
+    transition, since the root is never a child), output[node] is
+    (pattern_length, bonus) if a trigger ends at that node. Node 0 is the
+    root.
+    """
+    goto: list[list[int]] = [[0] * _NUM_TOKENS]
+    output: list[tuple[int, float] | None] = [None]
+    for pattern, bonus in triggers:
+        node = 0
+        for move in pattern:
+            t = MOVE_TO_ID[move]
+            child = goto[node][t]
+            if not child:
+                child = len(goto)
+                goto.append([0] * _NUM_TOKENS)
+                output.append(None)
+                goto[node][t] = child
+            node = child
+        if output[node] is None:
+            output[node] = (len(pattern), bonus)
+    return tuple(tuple(row) for row in goto), tuple(output)
+
+
+_TRIGGER_GOTO, _TRIGGER_OUTPUT = _build_trigger_trie(TRIGGER_BONUSES)
+
+# Lower bound on ergonomic_score per move: the cheapest move plus the
+# largest per-move trigger bonus. Regrip penalties are never negative and
+# triggers don't overlap, so ergonomic_score(alg) >= len(moves) * this.
+MIN_SCORE_PER_MOVE: float = min(MOVE_COSTS.values()) + min(
+    0.0, min(bonus / len(pattern) for pattern, bonus in TRIGGER_BONUSES)
+)
+
+
+def _apply_trigger_bonuses(ids: tuple[int, ...]) -> float:
     """Greedy left-to-right, longest-first trigger matching.
 
     Returns total bonus (negative value = score improvement).
-    Consumed positions are skipped so triggers don't overlap.
+    At each start position the trigger trie is walked once to find the
+    longest trigger beginning there; a match consumes its moves, so
+    triggers don't overlap. Matches are contiguous and scanning resumes
+    right after one, so consumed positions never need to be tracked.
     """
-    consumed: set[int] = set()
+    goto = _TRIGGER_GOTO
+    output = _TRIGGER_OUTPUT
+    n = len(ids)
     total_bonus = 0.0
 
     i = 0
-    while i < len(moves):
-        if i in consumed:
-            i += 1
-            continue
-        matched = False
-        for pattern, bonus in TRIGGER_BONUSES:
-            plen = len(pattern)
-            if i + plen > len(moves):
-                continue
-            # Collect non-consumed positions for this window
-            positions = []
-            j = i
-            while j < len(moves) and len(positions) < plen:
-                if j not in consumed:
-                    positions.append(j)
-                j += 1
-            if len(positions) < plen:
-                continue
-            # Check if the moves at these positions match the pattern
-            if all(moves[positions[k]] == pattern[k] for k in range(plen)):
-                for p in positions:
-                    consumed.add(p)
-                total_bonus += bonus
-                matched = True
-                break  # restart scan from next position
-        if not matched:
+    while i < n:
+        node = 0
+        best = None
+        j = i
+        while j < n:
+            node = goto[node][ids[j]]
+            if not node:
+                break
+            if output[node] is not None:
+                best = output[node]
+            j += 1
+        if best is None:
             i += 1
         else:
-            i += 1
+            plen, bonus = best
+            total_bonus += bonus
+            i += plen
     return total_bonus
 
 
@@ -135,32 +261,86 @@ def _apply_trigger_bonuses(moves: list[str]) -> float:
 # 4. Top-level scoring function
 # ---------------------------------------------------------------------------
 
+# Specialized move-cost + regrip scorers, compiled per token count on first
+# use. Each unrolls both sums over zoned token ids, so scoring the common
+# short algorithms runs no Python loops. Longer algorithms, or ones with
+# zoneless moves (whose regrip pairs are skipped), use the generic loops.
+_MAX_SPECIALIZED_LEN = 32
+_SPECIALIZED: dict[int, Callable[[tuple[int, ...]], float]] = {}
+
+
+def _specialized_scorer(n: int) -> Callable[[tuple[int, ...]], float]:
+    """Return the unrolled cost + regrip scorer for n zoned tokens.
+
+    Sums are emitted in the same left-to-right order as the generic path,
+    so results are bit-identical.
+    """
+    fn = _SPECIALIZED.get(n)
+    if fn is None:
+        names = [f"t{i}" for i in range(n)]
+        costs = " + ".join(f"cost[{t}]" for t in names)
+        pairs = " + ".join(
+            f"pair[{a} * {_NUM_TOKENS} + {b}]" for a, b in zip(names, names[1:])
+        ) or "0.0"
+        src = (
+            f"def _score_{n}(ids):\n"
+            f"    {', '.join(names)}, = ids\n"
+            f"    return ({costs}) + ({pairs})\n"
+        )
+        namespace = {"cost": _COST_TBL, "pair": _PAIR_REGRIP_TBL}
+        exec(compile(src, f"<_score_{n}>", "exec"), namespace)
+        fn = _SPECIALIZED[n] = namespace[f"_score_{n}"]
+    return fn
+
+
 def parse_algorithm(alg: str) -> list[str]:
     """Split an algorithm string into a list of move tokens."""
     return alg.strip().split()
 
 
-def ergonomic_score(algorithm: str) -> float:
-    """Score an algorithm string. Lower = more ergonomic.
+# Sized to hold every distinct solution of a long multi-pair search run.
+_SCORE_CACHE_SIZE = 1 << 18
 
-    Total = sum(move costs) + regrip penalties + trigger bonuses.
-    """
-    moves = parse_algorithm(algorithm)
-    if not moves:
+
+def _score_ids(ids: tuple[int, ...]) -> float:
+    """Score a tuple of move token ids (uncached core of the scorers)."""
+    if not ids:
         return 0.0
 
-    # Per-move base costs
-    cost = sum(MOVE_COSTS.get(m, 3.0) for m in moves)
+    if len(ids) <= _MAX_SPECIALIZED_LEN and max(ids) < _NUM_ZONED:
+        # Per-move base costs + regrip penalties, unrolled
+        cost = _specialized_scorer(len(ids))(ids)
+    else:
+        # Per-move base costs
+        cost_tbl = _COST_TBL
+        cost = sum([cost_tbl[t] for t in ids])
 
-    # Regrip penalties
-    cost += _count_regrip_cost(moves)
+        # Regrip penalties
+        cost += _count_regrip_cost(ids)
 
     # Trigger bonuses (negative values reduce cost)
-    cost += _apply_trigger_bonuses(moves)
+    cost += _apply_trigger_bonuses(ids)
 
     return cost
 
 
+@functools.lru_cache(maxsize=_SCORE_CACHE_SIZE)
+def ergonomic_score(algorithm: str) -> float:
+    """Score an algorithm string. Lower = more ergonomic.
+
+    Total = sum(move costs) + regrip penalties + trigger bonuses.
+    Results are cached by algorithm string (ergonomic_score.cache_clear()
+    resets it), since search scores the same solutions many times.
+    """
+    return _score_ids(tokenize_algorithm(algorithm))
+
+
+@functools.lru_cache(maxsize=_SCORE_CACHE_SIZE)
+def score_ids(ids: tuple[int, ...]) -> float:
+    """ergonomic_score() for a tuple of MOVE_TO_ID ids, cached by tuple."""
+    return _score_ids(ids)
+
+
 # ---------------------------------------------------------------------------
 # 5. Move simplification — stack-based cancellation and merging
 # ---------------------------------------------------------------------------
@@ -200,9 +380,51 @@ def _quarters_to_move(face: str, quarters: int) -> str | None:
         return f"{face}'"
 
 
+# Integer encoding for simplify_moves: each token maps to (face_id, quarters)
+# and _FQ_TO_MOVE[face_id][quarters] maps back (index 0 = cancelled).
+# Common faces are registered up front; any other token registers its face
+# on first sight.
+_MOVE_TO_FQ: dict[str, tuple[int, int]] = {}
+_FQ_TO_MOVE: list[tuple[str | None, str, str, str]] = []
+
+
+def _register_face(face: str) -> int:
+    face_id = len(_FQ_TO_MOVE)
+    _FQ_TO_MOVE.append(tuple(_quarters_to_move(face, q) for q in range(4)))
+    for q in range(1, 4):
+        _MOVE_TO_FQ.setdefault(_FQ_TO_MOVE[face_id][q], (face_id, q))
+    return face_id
+
+
+for _face in _ALPHABET_FACES:
+    _register_face(_face)
+del _face
+
+# The same encoding per alphabet id, for simplify_ids: _ID_FACE[t] and
+# _ID_QUARTERS[t] give a move's face and quarter turns, and
+# _FQ_TO_ID[face_id * 4 + quarters] maps back (None = cancelled).
+_ID_FACE: tuple[int, ...] = tuple(_MOVE_TO_FQ[m][0] for m in ID_TO_MOVE)
+_ID_QUARTERS: tuple[int, ...] = tuple(_MOVE_TO_FQ[m][1] for m in ID_TO_MOVE)
+_FQ_TO_ID: tuple[int | None, ...] = tuple(
+    MOVE_TO_ID.get(move) if move is not None else None
+    for moves in _FQ_TO_MOVE for move in moves
+)
+
+
+def _move_fq(move: str) -> tuple[int, int]:
+    """(face_id, quarters) for a token not yet in _MOVE_TO_FQ."""
+    face_id = _register_face(_base_face(move))
+    fq = (face_id, _move_quarters(move))
+    _MOVE_TO_FQ[move] = fq
+    return fq
+
+
 def simplify_moves(moves: list[str]) -> list[str]:
     """Stack-based cancellation and merging of consecutive same-face moves.
 
+    The stack holds (face_id, quarters) pairs, so merging is an integer add
+    mod 4; strings are rebuilt from a table once at the end.
+
     Examples:
         ["R", "R"]   -> ["R2"]
         ["R", "R'"]  -> []
@@ -210,25 +432,43 @@ def simplify_moves(moves: list[str]) -> list[str]:
         ["R2", "R2"] -> []         (4 quarter-turns = identity)
         ["R2", "R'"] -> ["R"]
     """
-    stack: list[str] = []
+    move_to_fq = _MOVE_TO_FQ
+    stack: list[tuple[int, int]] = []
     for move in moves:
-        if not stack:
-            stack.append(move)
-            continue
-
-        top = stack[-1]
-        if _base_face(top) == _base_face(move):
+        fq = move_to_fq.get(move) or _move_fq(move)
+        if stack and stack[-1][0] == fq[0]:
             # Same face — merge quarter-turn counts
-            combined = (_move_quarters(top) + _move_quarters(move)) % 4
-            stack.pop()
-            result = _quarters_to_move(_base_face(move), combined)
-            if result is not None:
-                stack.append(result)
-            # If result is None the moves cancelled completely — nothing pushed
+            q = (stack.pop()[1] + fq[1]) & 3
+            if q:
+                stack.append((fq[0], q))
+            # If q == 0 the moves cancelled completely — nothing pushed
         else:
-            stack.append(move)
+            stack.append(fq)
+
+    fq_to_move = _FQ_TO_MOVE
+    return [fq_to_move[face_id][q] for face_id, q in stack]
 
-    return stack
+
+def simplify_ids(ids: tuple[int, ...]) -> tuple[int, ...]:
+    """simplify_moves() on a tuple of MOVE_TO_ID ids.
+
+    The stack holds ids directly; merging looks the face and quarter turns
+    up by id, and the alphabet holds every turn of its faces, so the merged
+    move always has an id.
+    """
+    id_face = _ID_FACE
+    id_quarters = _ID_QUARTERS
+    fq_to_id = _FQ_TO_ID
+    stack: list[int] = []
+    for t in ids:
+        face = id_face[t]
+        if stack and id_face[stack[-1]] == face:
+            q = (id_quarters[stack.pop()] + id_quarters[t]) & 3
+            if q:
+                stack.append(fq_to_id[face * 4 + q])
+        else:
+            stack.append(t)
+    return tuple(stack)
 
 
 # ---------------------------------------------------------------------------
@@ -267,6 +507,20 @@ if __name__ == "__main__":
     check("No merge across different faces",
           simplify_moves(["R", "U", "R"]), ["R", "U", "R"])
 
+    # -- move alphabet tests --
+    print("\n--- move alphabet ---")
+    check("encode/decode round trip",
+          decode_moves(encode_moves(["y'", "R", "U2", "r'", "x2"])),
+          "y' R U2 r' x2")
+    check("simplify_ids matches simplify_moves",
+          decode_moves(simplify_ids(encode_moves(
+              ["R", "R", "U", "y", "y", "y2", "U'", "F2", "F'"]))),
+          " ".join(simplify_moves(
+              ["R", "R", "U", "y", "y", "y2", "U'", "F2", "F'"])))
+    check("score_ids matches ergonomic_score",
+          score_ids(encode_moves(["y", "R", "U", "R'", "F", "U'", "y'"])),
+          ergonomic_score("y R U R' F U' y'"))
+
     # -- ergonomic_score tests --
     print("\n--- ergonomic_score ---")
 
@@ -292,18 +546,29 @@ if __name__ == "__main__":
     empty_score = ergonomic_score("")
     check("Empty alg = 0", empty_score, 0.0)
 
+    # -- Trigger matching tests --
+    print("\n--- Trigger matching ---")
+    # Longest trigger at a start wins (OLL trigger, not the sexy inside it)
+    check("OLL trigger preferred over sexy",
+          _apply_trigger_bonuses(tokenize_algorithm("F R U R' U' F'")), -2.0)
+    # After a match, scanning resumes right after it
+    check("Back-to-back inserts",
+          _apply_trigger_bonuses(tokenize_algorithm("R U R' U R U' R'")), -3.0)
+    check("Sledgehammer then insert",
+          _apply_trigger_bonuses(tokenize_algorithm("R' F R F' R U R'")), -3.0)
+
     # -- Regrip-specific tests --
     print("\n--- Regrip detection ---")
     # standard->front should be reduced penalty
-    rf_cost = _count_regrip_cost(["R", "F"])
+    rf_cost = _count_regrip_cost(tokenize_algorithm("R F"))
     check("R->F reduced regrip = 1.0", rf_cost, 1.0)
 
     # standard->left should be full penalty
-    rl_cost = _count_regrip_cost(["R", "L"])
+    rl_cost = _count_regrip_cost(tokenize_algorithm("R L"))
     check("R->L full regrip = 2.0", rl_cost, 2.0)
 
     # No regrip within same zone
-    ru_cost = _count_regrip_cost(["R", "U", "R'"])
+    ru_cost = _count_regrip_cost(tokenize_algorithm("R U R'"))
     check("R U R' no regrip = 0.0", ru_cost, 0.0)
 
     print("\n" + "=" * 60)
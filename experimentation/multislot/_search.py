@@ -15,11 +15,15 @@ by the integrator, keeping this module free of scoring/canonicalization
 concerns.
 """
 
+import contextlib
+import functools
+import multiprocessing
 import os
 import sys
-import random
 import time
 
+import numpy as np
+
 # ---------------------------------------------------------------------------
 # Path setup — locate the cube-photo-solve and blender modules
 # ---------------------------------------------------------------------------
@@ -57,9 +61,48 @@ MOVE_WEIGHTS = {
     'B': 1,  "B'": 1,
 }
 
-# Pre-compute cumulative weight list for random.choices
+# Pre-compute weight list for move sampling
 _WEIGHTS_LIST = [MOVE_WEIGHTS[m] for m in SEARCH_MOVES]
 
+# Face order used to prune redundant sequences: faces are paired by axis
+# (U/D, F/B, R/L), and of two commuting opposite faces only the
+# lower-ordered one may come first.
+_FACE_ORDER = 'UDFBRL'
+_MOVE_FACE_ID = np.array([_FACE_ORDER.index(m[0]) for m in SEARCH_MOVES])
+_START_STATE = len(_FACE_ORDER)
+
+
+def _move_allowed(prev_face, face):
+    """Whether a turn of face may follow a turn of prev_face."""
+    if prev_face == _START_STATE:
+        return True
+    if face == prev_face:
+        return False
+    # Same axis: forbid the lower face after the higher (e.g. U after D)
+    return not (face // 2 == prev_face // 2 and face < prev_face)
+
+
+def _allowed_cum_probs():
+    """Cumulative move probabilities for each previous face (+ start).
+
+    Row f gives the weighted distribution over SEARCH_MOVES with moves
+    disallowed after face f given zero width.
+    """
+    table = np.zeros((_START_STATE + 1, len(SEARCH_MOVES)))
+    for prev in range(_START_STATE + 1):
+        w = np.array([wt if _move_allowed(prev, face) else 0.0
+                      for wt, face in zip(_WEIGHTS_LIST, _MOVE_FACE_ID)])
+        table[prev] = np.cumsum(w / w.sum())
+        table[prev, -1] = 1.0
+    return table
+
+
+_ALLOWED_CUM_P = _allowed_cum_probs()
+
+# Trials sampled per NumPy call; bounds the move buffer to
+# _SAMPLE_BLOCK x max_depth entries regardless of num_trials.
+_SAMPLE_BLOCK = 10_000
+
 ALL_SLOTS = ('FR', 'FL', 'BR', 'BL')
 
 
@@ -67,6 +110,56 @@ ALL_SLOTS = ('FR', 'FL', 'BR', 'BL')
 # Target-state checker
 # ---------------------------------------------------------------------------
 
+# Facets that must match their face center for the cross and each slot,
+# mirroring Cube.is_cross_solved / Cube._is_pair_solved.
+_CROSS_FACETS = (('D', 1), ('D', 3), ('D', 5), ('D', 7),
+                 ('F', 7), ('R', 7), ('B', 7), ('L', 7))
+_SLOT_FACETS = {
+    'FR': (('F', 8), ('R', 6), ('D', 2), ('F', 5), ('R', 3)),
+    'FL': (('F', 6), ('L', 8), ('D', 0), ('F', 3), ('L', 5)),
+    'BR': (('B', 6), ('R', 8), ('D', 8), ('B', 3), ('R', 5)),
+    'BL': (('B', 8), ('L', 6), ('D', 6), ('B', 5), ('L', 3)),
+}
+# Bit for each slot in a state mask; the cross is bit 4.
+_SLOT_BIT = {'FR': 1 << 3, 'FL': 1 << 2, 'BR': 1 << 1, 'BL': 1}
+_CROSS_BIT = 1 << 4
+_ALL_SLOTS_MASK = _CROSS_BIT | sum(_SLOT_BIT.values())
+
+
+def _facets_solved(faces, facets):
+    for face, idx in facets:
+        f = faces[face]
+        if f[idx] != f[4]:
+            return False
+    return True
+
+
+def _state_mask(cube):
+    """Return the solvedness bitmask (cross<<4 | FR<<3 | FL<<2 | BR<<1 | BL).
+
+    An unsolved cross returns 0 without checking the slots, since no
+    target mask can match it anyway.
+    """
+    faces = cube.faces
+    if not _facets_solved(faces, _CROSS_FACETS):
+        return 0
+    mask = _CROSS_BIT
+    for slot, facets in _SLOT_FACETS.items():
+        if _facets_solved(faces, facets):
+            mask |= _SLOT_BIT[slot]
+    return mask
+
+
+@functools.lru_cache(maxsize=None)
+def _target_mask(target_slots):
+    """Expected mask for a frozenset of target slots: cross and every other
+    slot solved, the targets unsolved. Names outside ALL_SLOTS are ignored."""
+    mask = _ALL_SLOTS_MASK
+    for slot in target_slots:
+        mask &= ~_SLOT_BIT.get(slot, 0)
+    return mask
+
+
 def check_target_only(cube, target_slots):
     """Check that the cube has cross solved and exactly target_slots unsolved.
 
@@ -75,21 +168,76 @@ def check_target_only(cube, target_slots):
     - Each slot in target_slots is NOT solved.
     - Every other slot IS solved.
     """
-    if not cube.is_cross_solved():
-        return False
+    return _state_mask(cube) == _target_mask(frozenset(target_slots))
 
-    for slot in ALL_SLOTS:
-        solved = cube._is_pair_solved(slot)
-        if slot in target_slots:
-            # Target slot must be unsolved
-            if solved:
-                return False
-        else:
-            # Non-target slot must be solved
-            if not solved:
-                return False
 
-    return True
+# ---------------------------------------------------------------------------
+# Facelet-array cube
+# ---------------------------------------------------------------------------
+
+# A cube state is a uint8[48] row of face ids, one per
+# non-center facet in get_state_string order. Face turns never move
+# centers, so the 6 centers are left out of the state. Each move is a
+# gather permutation, so a whole block of walks advances with one NumPy
+# take per move position instead of per-move Python calls on Cube. The
+# enumeration uses the same representation with whole-scramble permutations.
+_FACES = ('U', 'D', 'F', 'B', 'L', 'R')
+_FACE_COLORS = tuple(Cube().faces[face][4] for face in _FACES)
+_STATE_FACETS = tuple((face, idx) for face in _FACES for idx in range(9)
+                      if idx != 4)
+_STATE_POS = {facet: k for k, facet in enumerate(_STATE_FACETS)}
+_SOLVED_STATE = np.array([_FACES.index(face) for face, _ in _STATE_FACETS],
+                         dtype=np.uint8)
+
+
+def _alg_perm(alg):
+    """Gather indices such that state[perm] applies alg to state.
+
+    alg may contain rotations as long as they cancel out (as in the
+    rotation-bracketed slot scrambles): the net effect must leave every
+    center in place.
+    """
+    probe = Cube()
+    for face in _FACES:
+        probe.faces[face] = [(face, i) for i in range(9)]
+    probe.apply_algorithm(alg)
+    return np.array(
+        [_STATE_POS[probe.faces[face][idx]] for face, idx in _STATE_FACETS],
+        dtype=np.intp)
+
+
+# One contiguous row per SEARCH_MOVES entry, plus an identity row used to
+# pad walks shorter than max_depth.
+_IDENTITY_MOVE = len(SEARCH_MOVES)
+_MOVE_PERMS = np.stack([_alg_perm(m) for m in SEARCH_MOVES] + [_alg_perm('')])
+
+
+def _facet_index(facets):
+    return np.array([_STATE_POS[facet] for facet in facets], dtype=np.intp)
+
+
+_CROSS_IDX = _facet_index(_CROSS_FACETS)
+_SLOT_IDX = {slot: _facet_index(facets) for slot, facets in _SLOT_FACETS.items()}
+
+
+def _target_hits(states, target_slots):
+    """Vectorized check_target_only over facelet arrays; returns a bool mask."""
+    ok = (states[:, _CROSS_IDX] == _SOLVED_STATE[_CROSS_IDX]).all(axis=1)
+    for slot, idx in _SLOT_IDX.items():
+        solved = (states[:, idx] == _SOLVED_STATE[idx]).all(axis=1)
+        ok &= solved != (slot in target_slots)
+    return ok
+
+
+def _cube_from_state(state):
+    """Build a Cube from one facelet-array row."""
+    cube = Cube()
+    colors = [_FACE_COLORS[c] for c in state.tolist()]
+    for f, face in enumerate(_FACES):
+        stickers = colors[f * 8:f * 8 + 8]
+        stickers.insert(4, _FACE_COLORS[f])
+        cube.faces[face] = stickers
+    return cube
 
 
 # ---------------------------------------------------------------------------
@@ -101,23 +249,32 @@ def _get_f2l_list():
     return [(name, alg) for name, alg in F2L_CASES.items() if alg]
 
 
+@functools.lru_cache(maxsize=None)
+def _slot_scramble_alg(slot, alg_str):
+    """Return the rotation-bracketed inverse of alg_str for slot, as one
+    move string (cached: there are only |F2L| x 4 distinct inputs)."""
+    rot = SLOT_ROTATION[slot]
+    inv_rot = INV_ROTATION[rot]
+    inv = invert_alg(alg_str)
+    return ' '.join(part for part in (rot, inv, inv_rot) if part)
+
+
 def _apply_slot_scramble(cube, slot, alg_str):
     """Scramble a single slot by applying the inverse of an F2L algorithm.
 
     Uses y-rotation bracketing so that algorithms written for FR
     can target any slot.
     """
-    rot = SLOT_ROTATION[slot]
-    inv_rot = INV_ROTATION[rot]
-    inv = invert_alg(alg_str)
+    cube.apply_algorithm(_slot_scramble_alg(slot, alg_str))
 
-    if rot:
-        cube.apply_algorithm(rot)
-    cube.apply_algorithm(inv)
-    if inv_rot:
-        cube.apply_algorithm(inv_rot)
+
+@functools.lru_cache(maxsize=None)
+def _slot_scramble_perm(slot, alg_str):
+    """Facelet permutation of _apply_slot_scramble(slot, alg_str), cached."""
+    return _alg_perm(_slot_scramble_alg(slot, alg_str))
 
 
+@functools.lru_cache(maxsize=None)
 def _build_slot_solution(slot, alg_str):
     """Build the move sequence that solves a single slot.
 
@@ -137,7 +294,59 @@ def _build_slot_solution(slot, alg_str):
     return ' '.join(parts)
 
 
-def enumerate_f2l_pairs(slot_pair, add_callback):
+# AUF moves inserted between the two slot scrambles, their inverses, and
+# their facelet permutations
+_ENUM_AUF_MOVES = ['', 'U', 'U2', "U'"]
+_ENUM_AUF_INV = {'': '', 'U': "U'", "U'": 'U', 'U2': 'U2'}
+_ENUM_AUF_PERMS = np.stack([_alg_perm(auf) for auf in _ENUM_AUF_MOVES])
+
+
+def _enumerate_case_a(slot_pair, f2l_list, case_a):
+    """Enumerate every (case_b x AUF) combination for one slot_a case.
+
+    Module-level so it can run in a worker process. All combinations are
+    built at once on facelet arrays: each is slot_a's scramble, an AUF and
+    slot_b's scramble applied as three cached permutations.
+
+    Returns:
+        (combos_tried, hits) where hits is a list of (cube, solution_str)
+        for the combinations that leave exactly slot_pair unsolved.
+    """
+    slot_a, slot_b = slot_pair
+    name_a, alg_a = case_a
+    n_aufs = len(_ENUM_AUF_MOVES)
+
+    # slot_a's scramble followed by each AUF: (n_aufs, 48)
+    state_a = _SOLVED_STATE[_slot_scramble_perm(slot_a, alg_a)]
+    mids = state_a[_ENUM_AUF_PERMS]
+    sol_a = _build_slot_solution(slot_a, alg_a)
+
+    # Every mid followed by every slot_b scramble, ordered (case_b, AUF)
+    perms_b = np.stack([_slot_scramble_perm(slot_b, alg_b)
+                        for _, alg_b in f2l_list])
+    states = mids[:, perms_b].transpose(1, 0, 2).reshape(-1, _SOLVED_STATE.size)
+
+    # Keep the combinations where exactly the target pair is unsolved
+    hits = []
+    for k in np.flatnonzero(_target_hits(states, slot_pair)):
+        b, a = divmod(int(k), n_aufs)
+        name_b, alg_b = f2l_list[b]
+        auf = _ENUM_AUF_MOVES[a]
+
+        # Build sequential solution: solve_b, undo_auf, solve_a
+        sol_b = _build_slot_solution(slot_b, alg_b)
+        undo_auf = _ENUM_AUF_INV[auf]
+
+        solution_parts = [sol_b]
+        if undo_auf:
+            solution_parts.append(undo_auf)
+        solution_parts.append(sol_a)
+        hits.append((_cube_from_state(states[k]), ' '.join(solution_parts)))
+
+    return len(states), hits
+
+
+def enumerate_f2l_pairs(slot_pair, add_callback, workers=1):
     """Enumerate all 2-slot scrambles by combining F2L inverse algorithms.
 
     For every combination of (case_a x case_b x AUF), builds a cube
@@ -157,59 +366,136 @@ def enumerate_f2l_pairs(slot_pair, add_callback):
     Args:
         slot_pair: Tuple of two slot names, e.g. ('FR', 'FL').
         add_callback: Callable(cube, solution_str, source_str).
+        workers: Number of processes to split case_a across. Results are
+            still delivered to add_callback in case order, in this process.
     """
     f2l_list = _get_f2l_list()
-    slot_a, slot_b = slot_pair
-
-    auf_moves = ['', 'U', 'U2', "U'"]
-    # Inverse of each AUF for the solution
-    auf_inv = {'': '', 'U': "U'", "U'": 'U', 'U2': 'U2'}
+    task = functools.partial(_enumerate_case_a, tuple(slot_pair), f2l_list)
 
     total_combos = 0
     valid_count = 0
 
-    for name_a, alg_a in f2l_list:
-        for name_b, alg_b in f2l_list:
-            for auf in auf_moves:
-                total_combos += 1
+    pool_ctx = (multiprocessing.Pool(workers) if workers > 1
+                else contextlib.nullcontext())
+    with pool_ctx as pool:
+        batches = pool.imap(task, f2l_list) if pool else map(task, f2l_list)
+        for combos, hits in batches:
+            total_combos += combos
+            valid_count += len(hits)
+            for cube, solution in hits:
+                add_callback(cube, solution, 'enumeration')
 
-                # Build the scrambled state
-                cube = Cube()
-                _apply_slot_scramble(cube, slot_a, alg_a)
-                if auf:
-                    cube.apply_algorithm(auf)
-                _apply_slot_scramble(cube, slot_b, alg_b)
+    print(f"[enumerate] slot_pair={slot_pair}: "
+          f"{total_combos} combos tried, {valid_count} valid states found")
 
-                # Check that exactly the target pair is unsolved
-                if not check_target_only(cube, slot_pair):
-                    continue
 
-                valid_count += 1
+# ---------------------------------------------------------------------------
+# Random walk search
+# ---------------------------------------------------------------------------
 
-                # Build sequential solution: solve_b, undo_auf, solve_a
-                sol_b = _build_slot_solution(slot_b, alg_b)
-                sol_a = _build_slot_solution(slot_a, alg_a)
-                undo_auf = auf_inv[auf]
+def _sample_block(np_rng, n, min_depth, max_depth):
+    """Sample n weighted random walks.
 
-                solution_parts = [sol_b]
-                if undo_auf:
-                    solution_parts.append(undo_auf)
-                solution_parts.append(sol_a)
-                solution = ' '.join(solution_parts)
+    Each move is drawn from _ALLOWED_CUM_P for the previous move's face,
+    so walks never repeat a face or turn commuting opposite faces in the
+    non-canonical order. Sampling is vectorized across the block, one
+    column (move position) at a time.
 
-                add_callback(cube.copy(), solution, 'enumeration')
+    Returns:
+        (depths, move_ids): int arrays of shape (n,) and (n, max_depth);
+        only the first depths[i] entries of row i are part of the walk.
+    """
+    depths = np_rng.integers(min_depth, max_depth + 1, size=n)
+    u = np_rng.random((n, max_depth))
+    move_ids = np.empty((n, max_depth), dtype=np.intp)
+    prev = np.full(n, _START_STATE)
+    for j in range(max_depth):
+        cum = _ALLOWED_CUM_P[prev]
+        ids = (cum <= u[:, j, None]).sum(axis=1)
+        move_ids[:, j] = ids
+        prev = _MOVE_FACE_ID[ids]
+    return depths, move_ids
+
+
+def _walk_states(depths, move_ids, states=None, scratch=None):
+    """Apply each row's walk to a solved facelet array; returns (n, 48).
+
+    states and scratch are optional preallocated (n, 48) uint8 buffers. They
+    are reset in place and ping-ponged between moves, so repeated blocks
+    allocate no new state arrays. The result is one of the two buffers.
+    """
+    n = len(depths)
+    if states is None:
+        states = np.empty((n, _SOLVED_STATE.size), dtype=np.uint8)
+    if scratch is None:
+        scratch = np.empty_like(states)
+    states[:] = _SOLVED_STATE
+    # Flat offset of each row, turning per-row permutations into flat
+    # gather indices for np.take(..., out=...)
+    row_offsets = np.arange(n)[:, None] * _SOLVED_STATE.size
+    for j in range(move_ids.shape[1]):
+        ids = np.where(depths > j, move_ids[:, j], _IDENTITY_MOVE)
+        idx = _MOVE_PERMS[ids]
+        idx += row_offsets
+        np.take(states, idx, out=scratch)
+        states, scratch = scratch, states
+    return states
+
+
+# State packing: 3 bits per facelet, 16 facelets per uint64 word, so a
+# 48-facelet state is a 3-int tuple -- a cheaper set key than the 54-char
+# get_state_string.
+_PACK_WORDS = 3
+_PACK_FACELETS = 16
+_PACK_SHIFTS = np.arange(_PACK_FACELETS, dtype=np.uint64) * np.uint64(3)
+
+
+def _pack_states(states):
+    """Pack (n, 48) facelet arrays into (n, 3) uint64 words."""
+    words = states.reshape(len(states), _PACK_WORDS, _PACK_FACELETS).astype(np.uint64)
+    return np.bitwise_or.reduce(words << _PACK_SHIFTS, axis=2)
+
+
+def _unpack_state(key):
+    """Inverse of _pack_states for one packed key; returns a uint8[48] row."""
+    words = np.array(key, dtype=np.uint64)[:, None]
+    return ((words >> _PACK_SHIFTS) & np.uint64(7)).astype(np.uint8).ravel()
+
+
+# Per-process state buffers for _walk_block, reset in place every block
+_WALK_BUFFERS = {}
+
+
+def _walk_block(slot_pair, min_depth, max_depth, block):
+    """Run one block of random walks and return its target hits.
+
+    Module-level so it can run in a worker process. block is
+    (n_trials, seed_sequence); each block has its own RNG stream, so
+    results depend only on the top-level seed, not on the worker count.
+
+    Returns:
+        (hit_states, hit_moves): (k, 48) facelet rows of the walks that
+        left exactly slot_pair unsolved, and each one's move-id list.
+    """
+    n, seed_seq = block
+    np_rng = np.random.default_rng(seed_seq)
+    depths, move_ids = _sample_block(np_rng, n, min_depth, max_depth)
 
-    print(f"[enumerate] slot_pair={slot_pair}: "
-          f"{total_combos} combos tried, {valid_count} valid states found")
+    if not _WALK_BUFFERS:
+        shape = (_SAMPLE_BLOCK, _SOLVED_STATE.size)
+        _WALK_BUFFERS['states'] = np.empty(shape, dtype=np.uint8)
+        _WALK_BUFFERS['scratch'] = np.empty(shape, dtype=np.uint8)
+    states = _walk_states(depths, move_ids, _WALK_BUFFERS['states'][:n],
+                          _WALK_BUFFERS['scratch'][:n])
 
+    hit_rows = np.flatnonzero(_target_hits(states, slot_pair))
+    hit_moves = [move_ids[row, :depths[row]].tolist() for row in hit_rows]
+    return states[hit_rows], hit_moves
 
-# ---------------------------------------------------------------------------
-# Random walk search
-# ---------------------------------------------------------------------------
 
 def random_walk_search(slot_pair, add_callback, num_trials=100_000,
                        min_depth=4, max_depth=15, seed=None,
-                       progress_interval=10_000):
+                       progress_interval=10_000, workers=1):
     """Search for 2-slot-unsolved states via weighted random moves.
 
     Applies a random sequence of moves to a solved cube, then checks
@@ -217,6 +503,9 @@ def random_walk_search(slot_pair, add_callback, num_trials=100_000,
     other slots intact). Hits are rare but produce states unreachable
     by simple enumeration.
 
+    Walks are run in blocks of _SAMPLE_BLOCK on facelet arrays; only hits
+    are turned back into Cube objects for the callback.
+
     Args:
         slot_pair: Tuple of two slot names, e.g. ('FR', 'FL').
         add_callback: Callable(cube, solution_str, source_str).
@@ -224,41 +513,50 @@ def random_walk_search(slot_pair, add_callback, num_trials=100_000,
         min_depth: Minimum move count per walk.
         max_depth: Maximum move count per walk.
         seed: RNG seed for reproducibility.
-        progress_interval: Print progress every N trials.
+        progress_interval: Print progress every N trials (checked once
+            per block).
+        workers: Number of processes to run blocks in. Hits are still
+            deduplicated and delivered to add_callback in block order, in
+            this process.
     """
-    rng = random.Random(seed)
+    starts = range(0, num_trials, _SAMPLE_BLOCK)
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(starts))
+    blocks = [(min(_SAMPLE_BLOCK, num_trials - start), seed_seq)
+              for start, seed_seq in zip(starts, seed_seqs)]
+    task = functools.partial(_walk_block, tuple(slot_pair),
+                             min_depth, max_depth)
+
     hit_count = 0
     seen_states = set()
     t0 = time.time()
 
-    for trial in range(1, num_trials + 1):
-        cube = Cube()
-        depth = rng.randint(min_depth, max_depth)
-
-        # Pick moves using weighted random selection
-        moves = rng.choices(SEARCH_MOVES, weights=_WEIGHTS_LIST, k=depth)
-
-        # Apply each move
-        for m in moves:
-            cube.apply_move(m)
-
-        # Check if this is a valid target state
-        if check_target_only(cube, slot_pair):
-            hit_count += 1
-            state_key = cube.get_state_string()
-            if state_key not in seen_states:
-                seen_states.add(state_key)
-                # The solution is the inverse of the applied moves
-                solution = invert_alg(' '.join(moves))
-                add_callback(cube.copy(), solution, 'random_walk')
-
-        # Progress reporting
-        if trial % progress_interval == 0:
-            elapsed = time.time() - t0
-            rate = trial / elapsed if elapsed > 0 else 0
-            print(f"[random_walk] {trial}/{num_trials} trials | "
-                  f"{hit_count} hits | {len(seen_states)} unique | "
-                  f"{elapsed:.1f}s | {rate:.0f} trials/sec")
+    pool_ctx = (multiprocessing.Pool(workers) if workers > 1
+                else contextlib.nullcontext())
+    with pool_ctx as pool:
+        results = pool.imap(task, blocks) if pool else map(task, blocks)
+        for start, (n, _), (hit_states, hit_moves) in zip(starts, blocks,
+                                                         results):
+            hit_count += len(hit_moves)
+            packed = _pack_states(hit_states).tolist()
+            for state, state_key, move_list in zip(hit_states,
+                                                   map(tuple, packed),
+                                                   hit_moves):
+                if state_key not in seen_states:
+                    seen_states.add(state_key)
+                    cube = _cube_from_state(state)
+                    # The solution is the inverse of the applied moves
+                    moves = [SEARCH_MOVES[i] for i in move_list]
+                    solution = invert_alg(' '.join(moves))
+                    add_callback(cube, solution, 'random_walk')
+
+            # Progress reporting
+            trial = start + n
+            if trial // progress_interval > start // progress_interval:
+                elapsed = time.time() - t0
+                rate = trial / elapsed if elapsed > 0 else 0
+                print(f"[random_walk] {trial}/{num_trials} trials | "
+                      f"{hit_count} hits | {len(seen_states)} unique | "
+                      f"{elapsed:.1f}s | {rate:.0f} trials/sec")
 
     elapsed = time.time() - t0
     print(f"[random_walk] DONE: {num_trials} trials, {hit_count} hits, "
@@ -365,6 +663,19 @@ if __name__ == "__main__":
     else:
         print("  FAIL")
 
+    # --- Test 4: State packing round-trip ---
+    print("\n--- Test 4: State packing ---")
+    depths, move_ids = _sample_block(np.random.default_rng(0), 1000, 4, 15)
+    states = _walk_states(depths, move_ids)
+    keys = [tuple(k) for k in _pack_states(states).tolist()]
+    assert all((_unpack_state(k) == st).all() for k, st in zip(keys, states)), \
+        "Unpacked state should match the original facelets"
+    strings = {_cube_from_state(st).get_state_string() for st in states}
+    assert len(set(keys)) == len(strings), \
+        "Packed keys should dedup exactly like state strings"
+    print(f"  {len(keys)} states round-trip, {len(strings)} distinct")
+    print("  PASS")
+
     print("\n" + "=" * 60)
     print("  Self-test complete")
     print("=" * 60)
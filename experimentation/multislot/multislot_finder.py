@@ -16,12 +16,23 @@ Usage:
 """
 
 import argparse
+import contextlib
+import functools
+import heapq
+import itertools
 import json
+import math
+import multiprocessing
 import os
 import sys
 import time
 from dataclasses import dataclass, asdict
 
+try:
+    import orjson  # optional: faster catalog save/load
+except ImportError:
+    orjson = None
+
 # ---------------------------------------------------------------------------
 # Path setup
 # ---------------------------------------------------------------------------
@@ -31,12 +42,13 @@ sys.path.insert(0, os.path.join(EXPERIMENT_DIR, "cube-photo-solve"))
 sys.path.insert(0, os.path.join(EXPERIMENT_DIR, "ml", "blender"))
 
 from state_resolver import Cube
-from algorithms import F2L_CASES, parse_algorithm
+from algorithms import parse_algorithm
 from f2l_scrambler import invert_alg
 
 # Import components
-from _scorer import ergonomic_score, simplify_moves
-from _canonicalize import canonical_key, make_state_key
+from _scorer import (MOVE_TO_ID, MIN_SCORE_PER_MOVE, decode_moves,
+                     encode_moves, score_ids, simplify_ids)
+from _canonicalize import canonical_key, key_to_str, key_from_str
 from _search import enumerate_f2l_pairs, random_walk_search, check_target_only
 
 # ---------------------------------------------------------------------------
@@ -53,7 +65,7 @@ ALL_SLOT_PAIRS = [
 ]
 
 
-@dataclass
+@dataclass(slots=True)
 class AlgEntry:
     algorithm: str
     score: float
@@ -62,17 +74,68 @@ class AlgEntry:
     auf: str           # pre-AUF needed (e.g. "U'")
 
 
+def _indented_json(value, level):
+    """json.dumps(value, indent=2) for a value nested level spaces deep.
+
+    Uses orjson when it is installed; its indent-2 output is the same for
+    the ASCII strings, ints and floats a catalog holds.
+    """
+    if orjson is not None:
+        text = orjson.dumps(value, option=orjson.OPT_INDENT_2).decode()
+    else:
+        text = json.dumps(value, indent=2)
+    return text.replace('\n', '\n' + ' ' * level)
+
+
+def _full_algorithm(auf, alg):
+    """The algorithm as executed, with any pre-AUF prepended."""
+    return f"{auf} {alg}".strip() if auf else alg
+
+
 class MultislotCatalog:
     """Catalog of multislot F2L algorithms organized by canonical state."""
 
     def __init__(self, slot_pair, max_per_case=5):
         self.slot_pair = tuple(slot_pair)
         self.max_per_case = max_per_case
-        self.cases = {}          # canonical_key -> list[AlgEntry]
+        # packed canonical key (int) -> bounded max-heap of
+        # (-score, -insertion_seq, AlgEntry); the root is the entry that
+        # would be evicted next (worst score, newest among ties).
+        self._heaps = {}
+        self._seen = {}          # packed canonical key -> set of full algs kept
+        self._seq = itertools.count()
         self._total_added = 0
         self._total_rejected = 0
 
-    def add(self, canonical_key_str, alg, score, move_count, source, auf=''):
+    @property
+    def cases(self):
+        """packed canonical key (int) -> list[AlgEntry], best score first.
+
+        Built from the per-case heaps on each access; ties keep insertion
+        order.
+        """
+        return {key: self._sorted_entries(key) for key in self._heaps}
+
+    def __len__(self):
+        """Number of cases, without building the sorted `cases` view."""
+        return len(self._heaps)
+
+    def iter_entries(self):
+        """Yield (packed key, AlgEntry) for every kept entry.
+
+        Cases come in insertion order, each best score first (ties in
+        insertion order), the same order as iterating `cases`, but one small
+        heap is sorted at a time instead of copying the whole catalog.
+        """
+        for key in self._heaps:
+            for entry in self._sorted_entries(key):
+                yield key, entry
+
+    def _sorted_entries(self, ckey):
+        """Entries of one case, best score first (ties in insertion order)."""
+        return [item[2] for item in sorted(self._heaps[ckey], reverse=True)]
+
+    def add(self, ckey, alg, score, move_count, source, auf=''):
         """Add an algorithm. Returns True if it was kept (new or better)."""
         entry = AlgEntry(
             algorithm=alg,
@@ -82,69 +145,101 @@ class MultislotCatalog:
             auf=auf,
         )
 
-        if canonical_key_str not in self.cases:
-            self.cases[canonical_key_str] = [entry]
+        full_alg = _full_algorithm(auf, alg)
+        item = (-score, -next(self._seq), entry)
+        seen = self._seen.get(ckey)
+        if seen is None:
+            self._heaps[ckey] = [item]
+            self._seen[ckey] = {full_alg}
             self._total_added += 1
             return True
 
-        entries = self.cases[canonical_key_str]
-
         # Check for duplicate algorithm
-        full_alg = f"{auf} {alg}".strip() if auf else alg
-        for e in entries:
-            existing_full = f"{e.auf} {e.algorithm}".strip() if e.auf else e.algorithm
-            if existing_full == full_alg:
-                self._total_rejected += 1
-                return False
+        if full_alg in seen:
+            self._total_rejected += 1
+            return False
 
         # Add and keep top N by score
-        entries.append(entry)
-        entries.sort(key=lambda e: e.score)
-        if len(entries) > self.max_per_case:
-            entries.pop()
-            if entry not in entries:
+        heap = self._heaps[ckey]
+        if len(heap) < self.max_per_case:
+            heapq.heappush(heap, item)
+        else:
+            worst = heapq.heappushpop(heap, item)
+            if worst is item:
                 self._total_rejected += 1
                 return False
+            evicted = worst[2]
+            seen.discard(_full_algorithm(evicted.auf, evicted.algorithm))
 
+        seen.add(full_alg)
         self._total_added += 1
         return True
 
+    def would_accept(self, ckey, min_score):
+        """Whether an algorithm scoring at least min_score could be kept.
+
+        False only when the case is full and min_score is already worse
+        than its worst kept score, so callers can skip scoring it.
+        """
+        heap = self._heaps.get(ckey)
+        if heap is None or len(heap) < self.max_per_case:
+            return True
+        return min_score <= -heap[0][0]
+
+    def best_scores(self):
+        """Best (lowest) score of each case, in case insertion order."""
+        return [-max(heap)[0] for heap in self._heaps.values()]
+
     def stats(self):
-        """Return summary statistics."""
-        if not self.cases:
+        """Return summary statistics.
+
+        One pass over the case heaps without sorting them. Only the scores
+        are collected, so the average can use math.fsum and not depend on
+        heap order.
+        """
+        if not self._heaps:
             return {
                 'total_cases': 0, 'total_algorithms': 0,
                 'avg_score': 0, 'best_score': 0, 'worst_best_score': 0,
                 'avg_move_count': 0,
             }
 
-        all_entries = [e for entries in self.cases.values() for e in entries]
-        best_per_case = [entries[0] for entries in self.cases.values()]
-        scores = [e.score for e in all_entries]
-        best_scores = [e.score for e in best_per_case]
-        move_counts = [e.move_count for e in all_entries]
+        total = 0
+        scores = []
+        move_sum = 0
+        min_moves = max_moves = None
         sources = {}
-        for e in all_entries:
-            sources[e.source] = sources.get(e.source, 0) + 1
+        for heap in self._heaps.values():
+            total += len(heap)
+            for _, _, e in heap:
+                scores.append(e.score)
+                move_sum += e.move_count
+                if min_moves is None or e.move_count < min_moves:
+                    min_moves = e.move_count
+                if max_moves is None or e.move_count > max_moves:
+                    max_moves = e.move_count
+                sources[e.source] = sources.get(e.source, 0) + 1
+        best_scores = self.best_scores()
 
         return {
-            'total_cases': len(self.cases),
-            'total_algorithms': len(all_entries),
-            'avg_score': sum(scores) / len(scores),
+            'total_cases': len(self._heaps),
+            'total_algorithms': total,
+            'avg_score': math.fsum(scores) / total,
             'best_score': min(scores),
             'worst_best_score': max(best_scores),
-            'avg_best_score': sum(best_scores) / len(best_scores),
-            'avg_move_count': sum(move_counts) / len(move_counts),
-            'min_move_count': min(move_counts),
-            'max_move_count': max(move_counts),
-            'sources': sources,
+            'avg_best_score': math.fsum(best_scores) / len(best_scores),
+            'avg_move_count': move_sum / total,
+            'min_move_count': min_moves,
+            'max_move_count': max_moves,
+            'sources': dict(sorted(sources.items())),
         }
 
     def to_json(self):
-        """Export as JSON-serializable dict."""
+        """Export as JSON-serializable dict (keys in readable string form)."""
         cases_out = {}
-        for key, entries in sorted(self.cases.items()):
-            cases_out[key] = [asdict(e) for e in entries]
+        for key in sorted(self._heaps):
+            cases_out[key_to_str(key, self.slot_pair)] = [
+                asdict(e) for e in self._sorted_entries(key)]
         return {
             'slot_pair': list(self.slot_pair),
             'stats': self.stats(),
@@ -152,21 +247,44 @@ class MultislotCatalog:
         }
 
     def save(self, path):
-        """Save catalog to JSON file."""
-        data = self.to_json()
-        data['generated_at'] = time.strftime('%Y-%m-%dT%H:%M:%S')
+        """Save catalog to JSON file.
+
+        Writes the same document as json.dump(to_json(), indent=2) plus
+        'generated_at', but streams the cases one at a time so the full
+        to_json() dict is never built. Only the keys are sorted up front;
+        each case is ordered from its heap just before it is written.
+        """
         with open(path, 'w') as f:
-            json.dump(data, f, indent=2)
+            f.write('{\n')
+            f.write(f'  "slot_pair": {_indented_json(list(self.slot_pair), 2)},\n')
+            f.write(f'  "stats": {_indented_json(self.stats(), 2)},\n')
+            f.write('  "cases": {')
+            sep = '\n'
+            for key in sorted(self._heaps):
+                entries = [asdict(e) for e in self._sorted_entries(key)]
+                f.write(f'{sep}    {json.dumps(key_to_str(key, self.slot_pair))}: '
+                        f'{_indented_json(entries, 4)}')
+                sep = ',\n'
+            f.write('\n  },\n' if sep != '\n' else '},\n')
+            generated_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+            f.write(f'  "generated_at": {json.dumps(generated_at)}\n}}')
         print(f"Saved catalog to {path}")
 
     @classmethod
     def load(cls, path):
-        """Load catalog from JSON file."""
-        with open(path) as f:
-            data = json.load(f)
+        """Load catalog from JSON file (parsed with orjson if installed)."""
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
         cat = cls(tuple(data['slot_pair']))
         for key, entries in data['cases'].items():
-            cat.cases[key] = [AlgEntry(**e) for e in entries]
+            ckey = key_from_str(key)
+            heap = [(-e['score'], -next(cat._seq), AlgEntry(**e))
+                    for e in entries]
+            heapq.heapify(heap)
+            cat._heaps[ckey] = heap
+            cat._seen[ckey] = {_full_algorithm(e['auf'], e['algorithm'])
+                               for e in entries}
         return cat
 
 
@@ -179,30 +297,36 @@ def make_add_callback(catalog):
     and adds results to the catalog."""
 
     def add_callback(scrambled_cube, solution_alg, source):
-        # Simplify the solution
-        moves = parse_algorithm(solution_alg)
-        simplified = simplify_moves(moves)
+        # Simplify the solution as move ids; strings are only rebuilt for
+        # algorithms the catalog keeps
+        moves = encode_moves(parse_algorithm(solution_alg))
+        simplified = simplify_ids(moves)
         if not simplified:
             return
-        clean_alg = ' '.join(simplified)
 
         # Canonicalize the scrambled state
         ckey, auf = canonical_key(scrambled_cube, catalog.slot_pair)
 
-        # Build the full solution with AUF prefix
+        # Build the full solution with AUF prefix. simplified has no two
+        # adjacent same-face moves, so the AUF can only merge with (or
+        # cancel) its first move; the rest is already final.
         if auf:
-            full_alg = f"{auf} {clean_alg}"
-            full_moves = parse_algorithm(full_alg)
-            full_simplified = simplify_moves(full_moves)
-            full_alg = ' '.join(full_simplified)
+            full_moves = (simplify_ids((MOVE_TO_ID[auf], simplified[0]))
+                          + simplified[1:])
         else:
-            full_alg = clean_alg
+            full_moves = simplified
+
+        # Skip scoring when even the best possible score for this length
+        # could not displace the case's current worst entry
+        move_count = len(full_moves)
+        if not catalog.would_accept(ckey, move_count * MIN_SCORE_PER_MOVE):
+            return
 
         # Score the full solution
-        score = ergonomic_score(full_alg)
-        move_count = len(parse_algorithm(full_alg))
+        score = score_ids(full_moves)
 
-        catalog.add(ckey, clean_alg, score, move_count, source, auf)
+        catalog.add(ckey, decode_moves(simplified), score, move_count,
+                    source, auf)
 
     return add_callback
 
@@ -211,7 +335,65 @@ def make_add_callback(catalog):
 # Validation
 # ---------------------------------------------------------------------------
 
-def validate_catalog(catalog):
+# Entries handed to each validation worker at a time
+_VALIDATE_CHUNK = 256
+
+
+def _validate_entry(slot_pair, key, entry):
+    """Validate one catalog entry; returns None if it passes, else an error dict.
+
+    Module-level so it can run in a worker process.
+    """
+    try:
+        # Build full solution
+        if entry.auf:
+            full_solution = f"{entry.auf} {entry.algorithm}"
+        else:
+            full_solution = entry.algorithm
+
+        # Create scrambled state by applying inverse
+        cube = Cube()
+        scramble = invert_alg(full_solution)
+        cube.apply_algorithm(scramble)
+
+        # Verify scrambled state
+        if not check_target_only(cube, slot_pair):
+            return {
+                'key': key_to_str(key, slot_pair),
+                'alg': full_solution,
+                'error': 'Scrambled state does not match target pair',
+                'cross_ok': cube.is_cross_solved(),
+                'unsolved': cube.get_unsolved_slots(),
+            }
+
+        # Apply solution
+        cube.apply_algorithm(full_solution)
+
+        # Verify solved
+        if not cube.is_f2l_solved():
+            return {
+                'key': key_to_str(key, slot_pair),
+                'alg': full_solution,
+                'error': 'Solution does not fully solve F2L',
+                'unsolved_after': cube.get_unsolved_slots(),
+            }
+
+        return None
+
+    except Exception as e:
+        return {
+            'key': key_to_str(key, slot_pair),
+            'alg': entry.algorithm,
+            'error': str(e),
+        }
+
+
+def _validate_task(slot_pair, task):
+    """_validate_entry for a (key, entry) pair, as pool.imap passes one arg."""
+    return _validate_entry(slot_pair, *task)
+
+
+def validate_catalog(catalog, workers=1):
     """Validate every algorithm in the catalog.
 
     For each algorithm:
@@ -220,60 +402,28 @@ def validate_catalog(catalog):
     3. Verify: cross intact, exactly target slots unsolved
     4. Apply (auf + algorithm)
     5. Verify: F2L fully solved
+
+    With workers > 1 the entries are checked in a process pool; errors are
+    still reported in catalog order.
     """
     passed = 0
     failed = 0
     errors = []
 
-    for key, entries in catalog.cases.items():
-        for entry in entries:
-            try:
-                # Build full solution
-                if entry.auf:
-                    full_solution = f"{entry.auf} {entry.algorithm}"
-                else:
-                    full_solution = entry.algorithm
-
-                # Create scrambled state by applying inverse
-                cube = Cube()
-                scramble = invert_alg(full_solution)
-                cube.apply_algorithm(scramble)
-
-                # Verify scrambled state
-                if not check_target_only(cube, catalog.slot_pair):
-                    failed += 1
-                    errors.append({
-                        'key': key,
-                        'alg': full_solution,
-                        'error': 'Scrambled state does not match target pair',
-                        'cross_ok': cube.is_cross_solved(),
-                        'unsolved': cube.get_unsolved_slots(),
-                    })
-                    continue
-
-                # Apply solution
-                cube.apply_algorithm(full_solution)
-
-                # Verify solved
-                if not cube.is_f2l_solved():
-                    failed += 1
-                    errors.append({
-                        'key': key,
-                        'alg': full_solution,
-                        'error': 'Solution does not fully solve F2L',
-                        'unsolved_after': cube.get_unsolved_slots(),
-                    })
-                    continue
+    tasks = list(catalog.iter_entries())
+    check = functools.partial(_validate_task, catalog.slot_pair)
 
+    pool_ctx = (multiprocessing.Pool(workers) if workers > 1
+                else contextlib.nullcontext())
+    with pool_ctx as pool:
+        results = (pool.imap(check, tasks, chunksize=_VALIDATE_CHUNK)
+                   if pool else map(check, tasks))
+        for error in results:
+            if error is None:
                 passed += 1
-
-            except Exception as e:
+            else:
                 failed += 1
-                errors.append({
-                    'key': key,
-                    'alg': entry.algorithm,
-                    'error': str(e),
-                })
+                errors.append(error)
 
     return {'passed': passed, 'failed': failed, 'errors': errors}
 
@@ -312,20 +462,18 @@ def print_report(catalog, search_time=None, num_trials=None):
         print(f"  {'Score':>6}  {'Moves':>5}  {'AUF':>3}  {'Source':>11}  Algorithm")
         print(f"  {'-'*6}  {'-'*5}  {'-'*3}  {'-'*11}  {'-'*30}")
 
-        all_entries = []
-        for key, entries in catalog.cases.items():
-            for e in entries:
-                all_entries.append(e)
-        all_entries.sort(key=lambda e: e.score)
+        top = heapq.nsmallest(
+            20, (e for _, e in catalog.iter_entries()),
+            key=lambda e: e.score)
 
-        for e in all_entries[:20]:
+        for e in top:
             auf_str = e.auf if e.auf else ' - '
             print(f"  {e.score:6.1f}  {e.move_count:5d}  {auf_str:>3}  "
                   f"{e.source:>11}  {e.algorithm}")
 
     # Score distribution
     if s['total_cases'] > 0:
-        best_scores = [entries[0].score for entries in catalog.cases.values()]
+        best_scores = catalog.best_scores()
         buckets = {}
         for sc in best_scores:
             bucket = int(sc // 5) * 5
@@ -375,6 +523,9 @@ Examples:
                         help='Validate all found algorithms after search')
     parser.add_argument('--top-per-case', type=int, default=5,
                         help='Keep top N algorithms per case. Default: 5')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Processes for enumeration, random walk and '
+                             'validation. Default: 1')
 
     args = parser.parse_args()
 
@@ -398,7 +549,7 @@ Examples:
     if not args.skip_enum:
         print(f"\n--- Phase 1: Enumeration ---")
         t0 = time.time()
-        enumerate_f2l_pairs(slot_pair, callback)
+        enumerate_f2l_pairs(slot_pair, callback, workers=args.workers)
         t1 = time.time()
         s = catalog.stats()
         print(f"After enumeration: {s['total_cases']} cases, "
@@ -407,7 +558,7 @@ Examples:
     # Phase 2: Random walk
     if not args.skip_walk:
         print(f"\n--- Phase 2: Random Walk ({args.trials:,} trials) ---")
-        cases_before = len(catalog.cases)
+        cases_before = len(catalog)
         random_walk_search(
             slot_pair, callback,
             num_trials=args.trials,
@@ -415,9 +566,10 @@ Examples:
             max_depth=args.max_depth,
             seed=args.seed,
             progress_interval=max(args.trials // 10, 10_000),
+            workers=args.workers,
         )
         s = catalog.stats()
-        new_cases = len(catalog.cases) - cases_before
+        new_cases = len(catalog) - cases_before
         print(f"After random walk: {s['total_cases']} cases, "
               f"{s['total_algorithms']} algs ({new_cases} new cases from walk)")
 
@@ -426,7 +578,7 @@ Examples:
     # Phase 3: Validation
     if args.validate:
         print(f"\n--- Phase 3: Validation ---")
-        results = validate_catalog(catalog)
+        results = validate_catalog(catalog, workers=args.workers)
         print(f"Validation: {results['passed']} passed, {results['failed']} failed")
         if results['errors']:
             for err in results['errors'][:5]: